@@ -21,8 +21,7 @@ _MODEL_CONTAINER_LABEL_DELIMITER = "_"
 
 
 def create_model_container_label(name, version):
-    return "{name}{delim}{version}".format(
-        name=name, delim=_MODEL_CONTAINER_LABEL_DELIMITER, version=version)
+    return "%s%s%s" % (name, _MODEL_CONTAINER_LABEL_DELIMITER, version)
 
 
 def parse_model_container_label(label):
@@ -30,12 +29,16 @@ def parse_model_container_label(label):
     if len(splits) != 2:
         raise ClipperException(
             "Unable to parse model container label {}".format(label))
-    return splits
+    return tuple(splits)
 
 
-class ContainerManager(object):
-    __metaclass__ = abc.ABCMeta
+# The __metaclass__ attribute is ignored on Python 3, so build the abstract
+# base class explicitly. This works on both Python 2 and 3 (abc.ABC does not
+# exist on Python 2).
+_ABC = abc.ABCMeta("_ABC", (object, ), {})
 
+
+class ContainerManager(_ABC):
     @abc.abstractmethod
     def start_clipper(self, query_frontend_image, mgmt_frontend_image,
                       cache_size):
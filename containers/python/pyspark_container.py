@@ -62,25 +62,17 @@ class PySparkContainer(rpc.ModelContainerBase):
         self.model = load_pyspark_model(metadata_path, self.spark,
                                         spark_model_path)
 
-    def predict_ints(self, inputs):
+    def _predict(self, inputs):
         preds = self.predict_func(self.spark, self.model, inputs)
-        return [str(p) for p in preds]
-
-    def predict_floats(self, inputs):
-        preds = self.predict_func(self.spark, self.model, inputs)
-        return [str(p) for p in preds]
-
-    def predict_doubles(self, inputs):
-        preds = self.predict_func(self.spark, self.model, inputs)
-        return [str(p) for p in preds]
-
-    def predict_bytes(self, inputs):
-        preds = self.predict_func(self.spark, self.model, inputs)
-        return [str(p) for p in preds]
-
-    def predict_strings(self, inputs):
-        preds = self.predict_func(self.spark, self.model, inputs)
-        return [str(p) for p in preds]
+        return list(map(str, preds))
+
+    # The predict function handles every input type identically, so all of
+    # the typed entry points resolve directly to the same method.
+    predict_ints = _predict
+    predict_floats = _predict
+    predict_doubles = _predict
+    predict_bytes = _predict
+    predict_strings = _predict
 
 
 if __name__ == "__main__":
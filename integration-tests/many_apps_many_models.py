@@ -8,8 +8,11 @@ import shutil
 import numpy as np
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from test_utils import (create_docker_connection, BenchmarkException,
-                        fake_model_data, headers, log_clipper_state)
+                        fake_model_data, headers, log_clipper_state,
+                        predict_concurrently, session, wait_for_model_replica)
 cur_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.abspath("%s/../clipper_admin" % cur_dir))
 from clipper_admin import __version__ as clipper_version, CLIPPER_TEMP_DIR
@@ -21,37 +24,41 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Number of apps that are set up and tested concurrently. Small values
+# capture most of the speedup; much larger pools tend to overload the Docker
+# daemon.
+NUM_APP_WORKERS = int(os.environ.get("CLIPPER_TEST_APP_WORKERS", 4))
 
-def deploy_model(clipper_conn, name, version, link=False):
+# Starting model containers rewrites shared state (e.g. the Prometheus
+# scrape config) without any locking, so only one deploy may run at a time.
+deploy_lock = threading.Lock()
+
+
+def deploy_model(clipper_conn, name, version, image, link=False):
     app_name = "%s-app" % name
     model_name = "%s-model" % name
-    clipper_conn.build_and_deploy_model(
-        model_name,
-        version,
-        "doubles",
-        fake_model_data,
-        "clipper/noop-container:{}".format(clipper_version),
-        num_replicas=1)
-    time.sleep(10)
+    with deploy_lock:
+        clipper_conn.deploy_model(
+            model_name, version, "doubles", image, num_replicas=1)
 
     if link:
         clipper_conn.link_model_to_app(app_name, model_name)
 
+    wait_for_model_replica(clipper_conn, model_name, version)
+
     success = False
     num_tries = 0
+    addr = clipper_conn.get_query_addr()
 
     while not success and num_tries < 5:
-        time.sleep(30)
+        if num_tries > 0:
+            # Give the query frontend time to start routing to the new version
+            time.sleep(10)
         num_preds = 25
         num_defaults = 0
-        addr = clipper_conn.get_query_addr()
-        for i in range(num_preds):
-            response = requests.post(
-                "http://%s/%s/predict" % (addr, app_name),
-                headers=headers,
-                data=json.dumps({
-                    'input': list(np.random.random(30))
-                }))
+        inputs = np.random.random((num_preds, 30)).tolist()
+        responses = predict_concurrently(addr, app_name, inputs)
+        for response in responses:
             result = response.json()
             if response.status_code == requests.codes.ok and result["default"]:
                 num_defaults += 1
@@ -68,6 +75,22 @@ def deploy_model(clipper_conn, name, version, link=False):
                                  (app_name, model_name, version))
 
 
+def wait_for_all(futures):
+    """
+    Waits for all of the futures to complete, re-raising the first
+    BenchmarkException once every future has finished.
+    """
+    errors = []
+    for future in as_completed(futures):
+        try:
+            future.result()
+        except BenchmarkException as e:
+            logger.error("Error: %s" % e)
+            errors.append(e)
+    if len(errors) > 0:
+        raise errors[0]
+
+
 def create_and_test_app(clipper_conn, name, num_models):
     app_name = "%s-app" % name
     clipper_conn.register_application(app_name, "doubles", "default_pred",
@@ -75,22 +98,29 @@ def create_and_test_app(clipper_conn, name, num_models):
     time.sleep(1)
 
     addr = clipper_conn.get_query_addr()
-    response = requests.post(
+    response = session.post(
         "http://%s/%s/predict" % (addr, app_name),
         headers=headers,
         data=json.dumps({
-            'input': list(np.random.random(30))
+            'input': np.random.random(30).tolist()
         }))
     response.json()
     if response.status_code != requests.codes.ok:
         logger.error("Error: %s" % response.text)
         raise BenchmarkException("Error creating app %s" % app_name)
 
+    # Every version of the model is deployed from the same model data, so
+    # build the image once and reuse it for all of the versions.
+    image = clipper_conn.build_model(
+        "%s-model" % name, "0", fake_model_data,
+        "clipper/noop-container:{}".format(clipper_version))
+
+    # Versions are deployed in order so that each one is the current version
+    # of the model while it is being tested.
     link = True
     for i in range(num_models):
-        deploy_model(clipper_conn, name, i, link)
+        deploy_model(clipper_conn, name, i, image, link)
         link = False
-        time.sleep(1)
 
 
 if __name__ == "__main__":
@@ -112,8 +142,12 @@ if __name__ == "__main__":
         try:
             logger.info("Running integration test with %d apps and %d models" %
                         (num_apps, num_models))
-            for a in range(num_apps):
-                create_and_test_app(clipper_conn, "testapp%s" % a, num_models)
+            with ThreadPoolExecutor(max_workers=NUM_APP_WORKERS) as executor:
+                wait_for_all([
+                    executor.submit(create_and_test_app, clipper_conn,
+                                    "testapp%s" % a, num_models)
+                    for a in range(num_apps)
+                ])
 
             if not os.path.exists(CLIPPER_TEMP_DIR):
                 os.makedirs(CLIPPER_TEMP_DIR)
@@ -6,8 +6,10 @@ import random
 import socket
 import docker
 import logging
+import requests
 import time
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 cur_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.abspath("%s/../clipper_admin" % cur_dir))
 from clipper_admin import (ClipperConnection, DockerContainerManager,
@@ -16,9 +18,22 @@ from clipper_admin import (ClipperConnection, DockerContainerManager,
 from clipper_admin.container_manager import CLIPPER_DOCKER_LABEL
 from clipper_admin import __version__ as clipper_version
 
+# Prefer orjson for encoding prediction payloads when it is installed
+try:
+    from orjson import dumps
+except ImportError:
+    from json import dumps
+
 logger = logging.getLogger(__name__)
 
 headers = {'Content-type': 'application/json'}
+
+# Shared across all of the requests a test makes so that connections to the
+# query frontend are kept alive and reused instead of reopened per request.
+session = requests.Session()
+session.mount("http://",
+              requests.adapters.HTTPAdapter(
+                  pool_connections=16, pool_maxsize=64))
 if not os.path.exists(CLIPPER_TEMP_DIR):
     os.makedirs(CLIPPER_TEMP_DIR)
 
@@ -36,6 +51,10 @@ class BenchmarkException(Exception):
 # range of ports where available ports can be found
 PORT_RANGE = [34256, 50000]
 
+# Dedicated generator for port selection, independent of the global random
+# state that tests may seed or share across threads
+_port_rng = random.Random()
+
 
 def get_docker_client():
     if "DOCKER_API_VERSION" in os.environ:
@@ -47,19 +66,29 @@ def get_docker_client():
 def find_unbound_port():
     """
     Returns an unbound port number on 127.0.0.1.
+
+    Every port in PORT_RANGE is probed at most once, in random order.
     """
-    while True:
-        port = random.randint(*PORT_RANGE)
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            sock.bind(("127.0.0.1", port))
-            # Make sure we clean up after binding
-            del sock
-            return port
-        except socket.error as e:
-            logger.info("Socket error: {}".format(e))
-            logger.info(
-                "randomly generated port %d is bound. Trying again." % port)
+    ports = list(range(PORT_RANGE[0], PORT_RANGE[1] + 1))
+    _port_rng.shuffle(ports)
+    # Keep the probe socket from being inherited by any child processes
+    # (SOCK_CLOEXEC is not defined on Python 2)
+    sock = socket.socket(
+        socket.AF_INET,
+        socket.SOCK_STREAM | getattr(socket, "SOCK_CLOEXEC", 0))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        for port in ports:
+            try:
+                sock.bind(("127.0.0.1", port))
+                return port
+            except socket.error as e:
+                logger.info("Socket error: {}".format(e))
+                logger.info("port %d is bound. Trying again." % port)
+    finally:
+        sock.close()
+    raise BenchmarkException(
+        "No unbound ports in range {}-{}".format(*PORT_RANGE))
 
 
 def create_docker_connection(cleanup=True, start_clipper=True):
@@ -133,6 +162,52 @@ def create_kubernetes_connection(cleanup=True,
         return cl
 
 
+# Maximum number of requests each predict_concurrently call has in flight
+MAX_CONCURRENT_PREDICTIONS = 16
+
+
+def predict_concurrently(addr, app_name, inputs):
+    """
+    Sends one prediction request to the application for each input, with
+    all of the requests in flight at once.
+
+    Returns the responses in the same order as the inputs.
+    """
+    url = "http://%s/%s/predict" % (addr, app_name)
+    payloads = [dumps({'input': x}) for x in inputs]
+    if len(payloads) == 0:
+        return []
+
+    def post(payload):
+        return session.post(url, headers=headers, data=payload)
+
+    # Bounded so that concurrent callers stay within the session's
+    # connection pool and connections are reused rather than discarded
+    num_workers = min(len(payloads), MAX_CONCURRENT_PREDICTIONS)
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(post, payloads))
+
+
+def wait_for_model_replica(clipper_conn, model_name, version, timeout=120):
+    """
+    Waits until a replica of the specified model version has connected to
+    Clipper.
+
+    Raises a BenchmarkException if no replica connects within `timeout`
+    seconds.
+    """
+    version = str(version)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for replica in clipper_conn.get_all_model_replicas(verbose=True):
+            if replica["model_name"] == model_name \
+                    and replica["model_version"] == version:
+                return
+        time.sleep(0.5)
+    raise BenchmarkException("Timed out waiting for a replica of MODEL %s:%s" %
+                             (model_name, version))
+
+
 def log_clipper_state(cl):
     pp = pprint.PrettyPrinter(indent=4)
     logger.info("\nAPPLICATIONS:\n{app_str}".format(